@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for the DeepStream orchestrator (manager_v2.py).
+
+Usage:
+    gunicorn -c gunicorn_conf.py manager_v2:app
+
+One worker keeps all pipeline state in a single process; the gthread
+worker serves requests from a fixed pool instead of one thread per request.
+"""
+
+# Same as ORCHESTRATOR_PORT in manager_v2.py
+bind = "0.0.0.0:5000"
+
+workers = 1
+worker_class = "gthread"
+threads = 16
+
+# Shutdown stops all pipelines in parallel: ~5s for them to exit, then SIGKILL
+graceful_timeout = 60
+
+
+def post_worker_init(worker):
+    """Install SIGCHLD reaping in the worker (gunicorn resets it to default)."""
+    import manager_v2
+    manager_v2.start_orchestrator()
+
+
+def worker_exit(server, worker):
+    """Terminate pipelines and remove temp configs when the worker stops."""
+    import manager_v2
+    manager_v2.cleanup_all()
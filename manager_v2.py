@@ -4,72 +4,154 @@ import signal
 import sys
 import yaml
 import time
-import uuid
+import itertools
+import queue
 import threading
 import atexit
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # ================= CONFIGURATION =================
 BINARY_PATH = "/opt/nvidia/deepstream/deepstream/sources/apps/sample_apps/deepstream-server/deepstream-server-app"
 TEMP_CONFIG_DIR = "./temp_configs"
 LOG_DIR = "./logs"
 ORCHESTRATOR_PORT = 5000
-
-# Health check interval in seconds
-HEALTH_CHECK_INTERVAL = 5
+# First port handed out when a spawn request does not specify one
+BASE_PIPELINE_PORT = 9000
 # =================================================
 
+# Prefer the libyaml-backed loader/dumper when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.json)."""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
 
 # Active pipelines dictionary
 active_pipelines = {}
 
-# Lock for thread-safe access to active_pipelines
+# Reverse lookup: child process pid -> pipeline id (kept in sync with active_pipelines)
+pid_to_pipeline = {}
+
+# Ports held by active pipelines or reserved by spawns still in progress
+used_ports = set()
+
+# Every port in [BASE_PIPELINE_PORT, next_port_cursor) is in used_ports
+next_port_cursor = BASE_PIPELINE_PORT
+
+# Lock for thread-safe access to active_pipelines, pid_to_pipeline and the port state
 pipelines_lock = threading.Lock()
 
-# Flag to stop the health check thread
-shutdown_flag = threading.Event()
+# Pipeline ids: 4 hex digits of the startup time + a per-process counter.
+# Unique for the lifetime of the orchestrator and distinct across restarts.
+PIPELINE_ID_PREFIX = f"{int(time.time()):08x}"[-4:]
+pipeline_id_counter = itertools.count()
+
+# Serialized base configs with the network settings forced and httpPort left
+# as PORT_PLACEHOLDER: path -> (mtime_ns, yaml text)
+PORT_PLACEHOLDER = "{{PORT}}"
+config_templates = {}
+config_templates_lock = threading.Lock()
 
+# Exited children reaped by the SIGCHLD handler, drained by the reaper thread.
+# SimpleQueue.put is reentrant, so it is safe to call from a signal handler.
+reaped_queue = queue.SimpleQueue()
 
-def ensure_dirs():   
+
+def ensure_dirs():
     """Ensure necessary directories exist."""
-    if not os.path.exists(TEMP_CONFIG_DIR):
-        os.makedirs(TEMP_CONFIG_DIR)
-    if not os.path.exists(LOG_DIR):
-        os.makedirs(LOG_DIR)
+    os.makedirs(TEMP_CONFIG_DIR, exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
 
 
-def generate_config(base_config_path, port):
-    """Generate a temporary config file with the specified port."""
-    if not os.path.exists(base_config_path):
-        raise FileNotFoundError(f"Config file not found: {base_config_path}")
+def load_config_template(base_config_path, mtime):
+    """
+    Return the base config serialized with the network settings forced and
+    httpPort set to PORT_PLACEHOLDER. Parsed and dumped once per file version,
+    so a spawn only needs a str.replace.
+    """
+    with config_templates_lock:
+        cached = config_templates.get(base_config_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
 
     with open(base_config_path, 'r') as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=YAML_LOADER)
 
     if 'server-app-ctx' not in config:
         config['server-app-ctx'] = {}
     
     # === FORCE NETWORK SETTINGS ===
-    config['server-app-ctx']['httpPort'] = str(port)
+    config['server-app-ctx']['httpPort'] = PORT_PLACEHOLDER
     config['server-app-ctx']['httpIp'] = "0.0.0.0"
     config['server-app-ctx']['enable'] = 1
     # ==============================
 
     if 'rest-server' in config:
         config['rest-server']['enable'] = 1
+
+    template = yaml.dump(config, Dumper=YAML_DUMPER, default_flow_style=False)
+    if template.count(PORT_PLACEHOLDER) != 1:
+        raise ValueError(f"{base_config_path} must not contain the text {PORT_PLACEHOLDER}")
+
+    with config_templates_lock:
+        config_templates[base_config_path] = (mtime, template)
+    return template
+
+
+def write_file_atomic(path, data):
+    """
+    Write bytes to a sibling temp file in a single write() and rename it into place,
+    so the pipeline never sees a half-written config.
+    """
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.rename(tmp_path, path)
+
+
+def generate_config(base_config_path, port):
+    """Generate a temporary config file with the specified port."""
+    if not os.path.exists(base_config_path):
+        raise FileNotFoundError(f"Config file not found: {base_config_path}")
+
+    template = load_config_template(base_config_path, os.stat(base_config_path).st_mtime_ns)
+    # The placeholder is dumped as a quoted string, so this yields httpPort: '<port>'
+    data = template.replace(PORT_PLACEHOLDER, str(port)).encode()
     
-    pipeline_id = str(uuid.uuid4())[:8]
+    pipeline_id = f"{PIPELINE_ID_PREFIX}{next(pipeline_id_counter):04x}"
     new_config_name = f"pipeline_{pipeline_id}_port_{port}.yml"
     new_config_path = os.path.join(TEMP_CONFIG_DIR, new_config_name)
 
-    with open(new_config_path, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False)
+    write_file_atomic(new_config_path, data)
 
     return pipeline_id, new_config_path
 
 
-def get_pipeline_env():
+def build_pipeline_env():
     """
     Creates the environment dictionary with the specific exports 
     required for DeepStream and the custom library paths.
@@ -96,20 +178,18 @@ def get_pipeline_env():
     return env
 
 
+# The pipeline environment never changes after startup, so build it once and
+# share it across spawns (Popen only reads it).
+PIPELINE_ENV = build_pipeline_env()
+
+
 def cleanup_dead_pipeline(pipeline_id, info, reason="died"):
     """
     Clean up a single dead pipeline.
-    Closes log file handle and removes temp config.
+    Removes temp config (the log file is owned by the child and kept).
     """
     print(f"[Orchestrator] Pipeline {pipeline_id} {reason}. Cleaning up...")
     
-    # Close log file handle
-    if 'log_file' in info and info['log_file']:
-        try:
-            info['log_file'].close()
-        except Exception as e:
-            print(f"[Orchestrator] Warning: Could not close log file for {pipeline_id}: {e}")
-    
     # Remove temp config file
     if 'temp_config_path' in info and os.path.exists(info['temp_config_path']):
         try:
@@ -122,59 +202,102 @@ def cleanup_dead_pipeline(pipeline_id, info, reason="died"):
     print(f"[Orchestrator] Pipeline {pipeline_id} cleaned up. Port {info.get('port', 'unknown')} is now available.")
 
 
+def release_port(port):
+    """Return a port to the pool. Caller must hold pipelines_lock."""
+    global next_port_cursor
+    used_ports.discard(port)
+    if BASE_PIPELINE_PORT <= port < next_port_cursor:
+        next_port_cursor = port
+
+
+def sigchld_handler(signum, frame):
+    """
+    Reap every exited child without blocking.
+    Runs in signal context, so it only hands the results to the reaper thread.
+    """
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            # No children left to wait for
+            break
+        if pid == 0:
+            break
+        reaped_queue.put((pid, status))
+
+
+def handle_reaped_child(pid, status):
+    """
+    Unregister and clean up the pipeline owning a reaped pid.
+    Returns the pipeline ID, or None if the pid is not (or no longer) tracked.
+    """
+    with pipelines_lock:
+        pipeline_id = pid_to_pipeline.pop(pid, None)
+        if pipeline_id is None:
+            # Already removed (killed by user or kill-all)
+            return None
+        info = active_pipelines.pop(pipeline_id)
+        release_port(info['port'])
+    
+    cleanup_dead_pipeline(pipeline_id, info,
+                          reason=f"exited with code {os.waitstatus_to_exitcode(status)}")
+    return pipeline_id
+
+
 def check_pipeline_health():
     """
-    Check all active pipelines and clean up dead ones.
+    Clean up pipelines whose process has already been reaped.
+    Only drains the reaped queue, so it costs nothing while every pipeline is alive.
     Returns list of cleaned up pipeline IDs.
     """
     dead_ids = []
     
-    with pipelines_lock:
-        for pid, info in list(active_pipelines.items()):
-            ret_code = info['process'].poll()
-            
-            if ret_code is not None:
-                # Process has exited
-                dead_ids.append(pid)
-                cleanup_dead_pipeline(pid, info, reason=f"exited with code {ret_code}")
+    while True:
+        try:
+            pid, status = reaped_queue.get_nowait()
+        except queue.Empty:
+            break
+        if pid is None:
+            # Shutdown sentinel belongs to the reaper thread
+            reaped_queue.put((pid, status))
+            break
         
-        # Remove dead pipelines from active list
-        for pid in dead_ids:
-            del active_pipelines[pid]
+        pipeline_id = handle_reaped_child(pid, status)
+        if pipeline_id is not None:
+            dead_ids.append(pipeline_id)
     
     return dead_ids
 
 
-def health_check_worker():
+def reaper_worker():
     """
-    Background worker that periodically checks pipeline health.
+    Background worker that cleans up pipelines reaped by sigchld_handler.
+    Sleeps on the queue, so it only wakes when a child actually exits.
     """
-    print(f"[Orchestrator] Health check worker started (interval: {HEALTH_CHECK_INTERVAL}s)")
+    print("[Orchestrator] Reaper worker started")
     
-    while not shutdown_flag.is_set():
-        # Wait for the interval or until shutdown
-        shutdown_flag.wait(timeout=HEALTH_CHECK_INTERVAL)
-        
-        if shutdown_flag.is_set():
+    while True:
+        pid, status = reaped_queue.get()
+        if pid is None:
+            # Shutdown sentinel
             break
         
-        # Check pipeline health
-        dead_ids = check_pipeline_health()
-        
-        if dead_ids:
-            print(f"[Orchestrator] Health check: Cleaned up {len(dead_ids)} dead pipeline(s): {dead_ids}")
+        handle_reaped_child(pid, status)
 
 
-def start_health_check_thread():
-    """Start the background health check thread."""
-    health_thread = threading.Thread(target=health_check_worker, daemon=True)
-    health_thread.start()
-    return health_thread
+def start_reaper_thread():
+    """Start the background reaper thread."""
+    reaper_thread = threading.Thread(target=reaper_worker, daemon=True)
+    reaper_thread.start()
+    return reaper_thread
 
 
 @app.route('/pipelines', methods=['GET'])
 def list_pipelines():
-    """List all active pipelines."""
+    """
+    List all active pipelines. Every listed pipeline is running: exited ones
+    are removed by the SIGCHLD reaper.
+    """
     # First, run a health check to clean up any dead pipelines
     check_pipeline_health()
     
@@ -185,14 +308,12 @@ def list_pipelines():
                 "id": pid,
                 "port": info['port'],
                 "config": info['base_config_path'],
-                "pid": info['process'].pid,
-                "running": info['process'].poll() is None
+                "pid": info['process'].pid
             })
     
     return jsonify({
         "active_pipelines": status_list, 
-        "count": len(status_list),
-        "health_check_interval": HEALTH_CHECK_INTERVAL
+        "count": len(status_list)
     })
 
 
@@ -217,6 +338,7 @@ def health_check_endpoint():
 @app.route('/pipelines/spawn', methods=['POST'])
 def spawn_pipeline():
     """Spawn a new pipeline."""
+    global next_port_cursor
     data = request.json
     base_config = data.get('config_path')
     requested_port = data.get('port')
@@ -224,83 +346,136 @@ def spawn_pipeline():
     if not base_config:
         return jsonify({"error": "config_path is required"}), 400
 
+    if requested_port:
+        try:
+            requested_port = int(requested_port)
+        except (TypeError, ValueError):
+            return jsonify({"error": "port must be an integer"}), 400
+
     # Run health check first to free up any dead pipeline ports
     check_pipeline_health()
 
+    # Reserve the port under the lock, then do the slow config/log file I/O
+    # outside it so concurrent requests are not serialized behind this spawn.
     with pipelines_lock:
         if not requested_port:
-            used_ports = [p['port'] for p in active_pipelines.values()]
-            requested_port = 9000
-            while requested_port in used_ports:
-                requested_port += 1
-        else:
-            for info in active_pipelines.values():
-                if info['port'] == requested_port:
-                    return jsonify({"error": f"Port {requested_port} is already in use"}), 409
-
-        try:
-            pipeline_id, temp_config_path = generate_config(base_config, requested_port)
-            
-            # Prepare Log File
-            log_file_path = os.path.join(LOG_DIR, f"{pipeline_id}.log")
-            log_file = open(log_file_path, "w", buffering=1)
-
-            cmd = [BINARY_PATH, temp_config_path]
-            print(f"[Orchestrator] Spawning: {' '.join(cmd)}")
-            print(f"[Orchestrator] Logging to: {log_file_path}")
-            
-            proc = subprocess.Popen(
-                cmd, 
-                env=get_pipeline_env(), 
-                stdout=log_file, 
-                stderr=subprocess.STDOUT
-            )
+            while next_port_cursor in used_ports:
+                next_port_cursor += 1
+            requested_port = next_port_cursor
+        elif requested_port in used_ports:
+            return jsonify({"error": f"Port {requested_port} is already in use"}), 409
+        used_ports.add(requested_port)
+
+    try:
+        pipeline_id, temp_config_path = generate_config(base_config, requested_port)
+        
+        # Prepare Log File. Only the child writes to it, so hand it a raw fd
+        # instead of keeping a buffered file object open in the orchestrator.
+        # Output deliberately goes straight to the file rather than through an
+        # orchestrator-side pipe: libc already block-buffers the child's stdout
+        # (it is not a tty), and a relay would add a copy per byte and stall
+        # pipelines on a full pipe whenever the orchestrator is busy or gone.
+        log_file_path = os.path.join(LOG_DIR, f"{pipeline_id}.log")
+        # O_CLOEXEC: the fd reaches the child only via the stdout/stderr dup2.
+        log_fd = os.open(log_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+
+        cmd = [BINARY_PATH, temp_config_path]
+        print(f"[Orchestrator] Spawning: {' '.join(cmd)}")
+        print(f"[Orchestrator] Logging to: {log_file_path}")
+        
+        # Spawn and register under the lock so the reaper can always
+        # map the child's pid back to its pipeline
+        with pipelines_lock:
+            try:
+                # close_fds=False lets subprocess use posix_spawn instead of
+                # fork/vfork + exec, and skips the child-side close loop up to
+                # RLIMIT_NOFILE. Safe: every fd the orchestrator opens is
+                # O_CLOEXEC (PEP 446), only stdout/stderr reach the child.
+                # Do not add start_new_session/cwd here, they force the fork path.
+                proc = subprocess.Popen(
+                    cmd, 
+                    env=PIPELINE_ENV, 
+                    stdout=log_fd, 
+                    stderr=subprocess.STDOUT,
+                    close_fds=False
+                )
+            finally:
+                # The child has its own copy now
+                os.close(log_fd)
             
+            pid_to_pipeline[proc.pid] = pipeline_id
             active_pipelines[pipeline_id] = {
                 "process": proc,
                 "port": requested_port,
                 "base_config_path": base_config,
                 "temp_config_path": temp_config_path,
-                "log_file": log_file,
                 "log_file_path": log_file_path,
                 "start_time": time.time()
             }
 
-            return jsonify({
-                "message": "Pipeline spawned successfully",
-                "pipeline_id": pipeline_id,
-                "port": requested_port,
-                "pipeline_api_url": f"http://localhost:{requested_port}/api/v1/",
-                "log_file": log_file_path
-            }), 201
+        return jsonify({
+            "message": "Pipeline spawned successfully",
+            "pipeline_id": pipeline_id,
+            "port": requested_port,
+            "pipeline_api_url": f"http://localhost:{requested_port}/api/v1/",
+            "log_file": log_file_path
+        }), 201
 
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        with pipelines_lock:
+            release_port(requested_port)
+        return jsonify({"error": str(e)}), 500
+
+
+def stop_processes(procs, timeout=5):
+    """
+    Terminate several pipeline processes in parallel: signal all of them first, then
+    wait against one shared deadline, so the total is bounded by the slowest process
+    rather than the sum. Same unregistering requirement as stop_process.
+    """
+    for proc in procs:
+        if proc.poll() is None:
+            proc.terminate()
+    
+    deadline = time.monotonic() + timeout
+    for proc in procs:
+        stop_process(proc, timeout=max(0, deadline - time.monotonic()))
+
+
+def stop_process(proc, timeout=5):
+    """
+    Terminate a pipeline process, escalating to SIGKILL after `timeout` seconds.
+    The pipeline must already be removed from pid_to_pipeline: poll()/wait() reap
+    the child here, so sigchld_handler must no longer be relied on for it.
+    """
+    if proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
 
 
 @app.route('/pipelines/<pipeline_id>', methods=['DELETE'])
 def kill_pipeline(pipeline_id):
     """Kill a specific pipeline."""
+    # Only unregister under the lock; the (up to 5s) wait happens outside it
+    # so other requests are not stalled. The port stays reserved until the
+    # process is actually gone.
     with pipelines_lock:
-        if pipeline_id not in active_pipelines:
+        info = active_pipelines.pop(pipeline_id, None)
+        if info is None:
             return jsonify({"error": "Pipeline ID not found"}), 404
+        pid_to_pipeline.pop(info['process'].pid, None)
 
-        info = active_pipelines[pipeline_id]
-        proc = info['process']
-        
-        # Terminate the process if still running
-        if proc.poll() is None:
-            proc.terminate()
-            try:
-                proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-                proc.wait()
-        
-        # Clean up resources
-        cleanup_dead_pipeline(pipeline_id, info, reason="terminated by user")
-        
-        del active_pipelines[pipeline_id]
+    stop_process(info['process'])
+    
+    # Clean up resources
+    cleanup_dead_pipeline(pipeline_id, info, reason="terminated by user")
+    
+    with pipelines_lock:
+        release_port(info['port'])
     
     return jsonify({"message": f"Pipeline {pipeline_id} terminated"}), 200
 
@@ -311,21 +486,20 @@ def kill_all_pipelines():
     killed = []
     
     with pipelines_lock:
-        for pid, info in list(active_pipelines.items()):
-            proc = info['process']
-            
-            if proc.poll() is None:
-                proc.terminate()
-                try:
-                    proc.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-                    proc.wait()
-            
-            cleanup_dead_pipeline(pid, info, reason="killed by kill-all")
-            killed.append(pid)
-        
+        drained = list(active_pipelines.items())
         active_pipelines.clear()
+        for pid, info in drained:
+            pid_to_pipeline.pop(info['process'].pid, None)
+    
+    stop_processes([info['process'] for pid, info in drained])
+    
+    for pid, info in drained:
+        cleanup_dead_pipeline(pid, info, reason="killed by kill-all")
+        killed.append(pid)
+    
+    with pipelines_lock:
+        for pid, info in drained:
+            release_port(info['port'])
     
     return jsonify({
         "message": f"Killed {len(killed)} pipeline(s)",
@@ -337,57 +511,41 @@ def cleanup_all():
     """
     Clean up all resources on shutdown.
     - Terminates all running pipelines
-    - Closes all log file handles
     - Removes all temp config files
     - Keeps log files for debugging
     """
     print("\n[Orchestrator] Shutting down...")
     
-    # Signal the health check thread to stop
-    shutdown_flag.set()
+    # Signal the reaper thread to stop
+    reaped_queue.put((None, None))
     
+    # Unregister under the lock (stop_processes reaps the children itself), then
+    # stop everything outside it, in parallel, so shutdown fits gunicorn's
+    # graceful_timeout however many pipelines are running
     with pipelines_lock:
-        for pid, info in active_pipelines.items():
-            print(f"[Orchestrator] Cleaning up pipeline {pid}...")
-            
-            # Terminate process if running
-            if info['process'].poll() is None:
-                print(f"[Orchestrator] Terminating pipeline {pid}...")
-                info['process'].terminate()
-                try:
-                    info['process'].wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    print(f"[Orchestrator] Force killing pipeline {pid}...")
-                    info['process'].kill()
-                    info['process'].wait()
-            
-            # Close log file handle
-            if 'log_file' in info and info['log_file']:
-                try:
-                    info['log_file'].close()
-                except:
-                    pass
-            
-            # Remove temp config file
-            if 'temp_config_path' in info and os.path.exists(info['temp_config_path']):
-                try:
-                    os.remove(info['temp_config_path'])
-                    print(f"[Orchestrator] Removed temp config: {info['temp_config_path']}")
-                except Exception as e:
-                    print(f"[Orchestrator] Warning: Could not remove {info['temp_config_path']}: {e}")
-        
+        drained = list(active_pipelines.items())
         active_pipelines.clear()
+        pid_to_pipeline.clear()
+    
+    for pid, info in drained:
+        print(f"[Orchestrator] Terminating pipeline {pid}...")
+    stop_processes([info['process'] for pid, info in drained])
+    
+    for pid, info in drained:
+        cleanup_dead_pipeline(pid, info, reason="stopped on shutdown")
     
     # Clean up any orphaned temp config files
-    if os.path.exists(TEMP_CONFIG_DIR):
-        for filename in os.listdir(TEMP_CONFIG_DIR):
-            if filename.endswith('.yml') or filename.endswith('.yaml'):
-                filepath = os.path.join(TEMP_CONFIG_DIR, filename)
-                try:
-                    os.remove(filepath)
-                    print(f"[Orchestrator] Removed orphaned config: {filepath}")
-                except Exception as e:
-                    print(f"[Orchestrator] Warning: Could not remove {filepath}: {e}")
+    try:
+        with os.scandir(TEMP_CONFIG_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(('.yml', '.yaml')):
+                    try:
+                        os.unlink(entry.path)
+                        print(f"[Orchestrator] Removed orphaned config: {entry.path}")
+                    except OSError as e:
+                        print(f"[Orchestrator] Warning: Could not remove {entry.path}: {e}")
+    except FileNotFoundError:
+        pass
     
     print("[Orchestrator] Cleanup complete. Logs preserved in:", LOG_DIR)
 
@@ -399,9 +557,25 @@ def signal_handler(signum, frame):
     sys.exit(0)
 
 
-if __name__ == '__main__':
+def start_orchestrator():
+    """
+    Per-process startup: directories, SIGCHLD reaping and the reaper thread.
+    Called by the dev server below and by gunicorn's post_worker_init hook
+    (see gunicorn_conf.py), so it must run in the process serving requests.
+    """
     ensure_dirs()
     
+    # Reap exited pipelines as soon as they die instead of polling
+    signal.signal(signal.SIGCHLD, sigchld_handler)
+    
+    # Start the reaper background thread
+    return start_reaper_thread()
+
+
+if __name__ == '__main__':
+    # Development server. For production use the bounded thread pool:
+    #   gunicorn -c gunicorn_conf.py manager_v2:app
+    
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -409,13 +583,12 @@ if __name__ == '__main__':
     # Register cleanup on exit
     atexit.register(cleanup_all)
     
-    # Start the health check background thread
-    health_thread = start_health_check_thread()
+    reaper_thread = start_orchestrator()
     
     print(f"==================================================")
     print(f" DEEPSTREAM ORCHESTRATOR RUNNING ON PORT {ORCHESTRATOR_PORT}")
     print(f"==================================================")
-    print(f" Health Check Interval: {HEALTH_CHECK_INTERVAL}s")
+    print(f" Health Check: on child exit (SIGCHLD)")
     print(f" Temp Configs: {os.path.abspath(TEMP_CONFIG_DIR)}")
     print(f" Logs: {os.path.abspath(LOG_DIR)}")
     print(f"==================================================")
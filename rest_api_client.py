@@ -5,31 +5,218 @@ Manage video streams dynamically across multiple pipelines
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import sys
 import argparse
-from datetime import datetime, UTC
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+from typing import Dict, Any, Iterable
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Accepted values for the enum-style setters
+BINARY_VALUES = frozenset((0, 1))
+SKIP_FRAMES_VALUES = frozenset((0, 1, 2))
+
+
+def encode_json(obj) -> bytes:
+    """Serialize a request body to compact UTF-8 bytes, using orjson when it is installed.
+    Sending bytes lets requests set Content-Length directly without re-encoding the body."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def emit_json(obj):
+    """Pretty-print a response to stdout for the CLI"""
+    if orjson is not None:
+        # Encoded bytes go straight to the binary buffer; flush first so earlier
+        # print() output (e.g. request errors) stays in order
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        sys.stdout.buffer.flush()
+    else:
+        print(json.dumps(obj, indent=2))
+
+
+# (epoch second, formatted "YYYY-mm-ddTHH:MM:SS") of the last timestamp, swapped as one tuple
+timestamp_prefix = (None, "")
+
+
+def utc_timestamp() -> str:
+    """Current UTC time as ISO 8601 with a Z suffix, e.g. 2025-01-01T12:00:00.000000Z.
+    The seconds part is formatted at most once per second and reused."""
+    global timestamp_prefix
+    second, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = timestamp_prefix
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        timestamp_prefix = (second, prefix)
+    return f"{prefix}.{nanos // 1000:06d}Z"
+
+
+@lru_cache(maxsize=32)
+def stream_metadata(resolution: str, codec: str, framerate: int) -> Dict:
+    """metadata block of /stream/add. Bulk adds reuse a handful of combinations, so the
+    dict is built once per combination and shared; it is only ever serialized, never mutated."""
+    return {
+        "resolution": resolution,
+        "codec": codec,
+        "framerate": framerate,
+    }
+
+
+def build_add_payload(camera_id: str, camera_name: str, rtsp_url: str,
+                      resolution: str, codec: str, framerate: int) -> Dict:
+    """Build the /stream/add request body"""
+    return {
+        "key": "sensor",
+        "value": {
+            "camera_id": camera_id,
+            "camera_name": camera_name,
+            "camera_url": rtsp_url,
+            "change": "camera_add",
+            "metadata": stream_metadata(resolution, codec, framerate)
+        },
+        "headers": {
+            "source": "python_client",
+            "created_at": utc_timestamp()
+        }
+    }
+
+
+def build_remove_payload(camera_id: str, rtsp_url: str) -> Dict:
+    """Build the /stream/remove request body"""
+    return {
+        "key": "sensor",
+        "value": {
+            "camera_id": camera_id,
+            "camera_url": rtsp_url,
+            "change": "camera_remove"
+        },
+        "headers": {
+            "source": "python_client",
+            "created_at": utc_timestamp()
+        }
+    }
+
 
-from typing import Dict, Any
+class ThrottleRetry(Retry):
+    """
+    Retry policy that also replays POSTs answered with 429/503: the server rejected them
+    without acting, so resending is safe. Other statuses keep urllib3's idempotent-only rule.
+    Backoff and Retry-After handling are inherited from Retry.
+    """
+
+    THROTTLE_STATUSES = frozenset((429, 503))
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if self.total and status_code in self.THROTTLE_STATUSES:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
 
 
 class DeepStreamRESTClient:
+    # (connect, read) timeout in seconds
+    TIMEOUT = (2, 10)
+    # Seconds a GET response is reused for, so tight polling loops hit the server once per window
+    CACHE_TTL = {
+        "/health/get-dsready-state": 0.25,
+        "/stream/get-stream-info": 1.0,
+    }
+
     def __init__(self, host: str = "localhost", port: int = 9002):
         self.base_url = f"http://{host}:{port}"
         self.api_version = "v1"
 
-    def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict[str, Any]:
-        """Make HTTP request to DeepStream REST API"""
-        url = f"{self.base_url}/api/{self.api_version}{endpoint}"
+        # Keep-alive connection pool, reused across calls instead of a new TCP connection per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=ThrottleRetry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self.api_root = f"{self.base_url}/api/{self.api_version}"
+        self.verbs = {"GET": self.session.get, "POST": self.session.post}
+        # endpoint -> (expires_at, response)
+        self.cache = {}
+        # POSTs queued inside a batch() block, None when not batching
+        self.pending = None
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @contextmanager
+    def batch(self, max_workers: int = 16):
+        """Queue POST calls made inside the block and send them concurrently when it exits.
+        The server has no multi-operation endpoint, so each op is still its own request,
+        but their round trips overlap on the pooled session instead of running back to back.
+
+        Usage:
+            with client.batch() as results:
+                client.force_idr("0", 1)
+                client.set_encoder_bitrate("0", 4000000)
+            # results now holds one response per queued call, in order
+        """
+        if self.pending is not None:
+            raise RuntimeError("batch() blocks cannot be nested")
 
+        self.pending = []
+        results = []
         try:
-            if method.upper() == "GET":
-                response = requests.get(url)
-            elif method.upper() == "POST":
-                response = requests.post(url, json=data, headers={"Content-Type": "application/json"})
-            else:
-                raise ValueError(f"Unsupported method: {method}")
+            yield results
+        finally:
+            pending, self.pending = self.pending, None
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                results.extend(executor.map(lambda op: self._make_request(*op), pending))
+            # Queued adds/removes skipped the per-call invalidation
+            self.cache.clear()
+
+    def _make_request(self, method: str, endpoint: str, data: Dict = None,
+                      parse_response: bool = True) -> Dict[str, Any]:
+        """Make HTTP request to DeepStream REST API.
+        With parse_response=False the body is not decoded and only the status is returned."""
+        verb = self.verbs.get(method)
+        if verb is None:
+            raise ValueError(f"Unsupported method: {method}")
+
+        if self.pending is not None and method == "POST":
+            self.pending.append((method, endpoint, data, parse_response))
+            return None
 
+        try:
+            body = None if data is None else encode_json(data)
+            response = verb(self.api_root + endpoint, data=body, timeout=self.TIMEOUT)
             response.raise_for_status()
+            if not parse_response:
+                return {"ok": response.ok, "status": response.status_code}
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error communicating with {self.base_url}: {e}")
@@ -37,56 +224,44 @@ class DeepStreamRESTClient:
                 print(f"Response: {e.response.text}")
             return None
 
+    def _cached_get(self, endpoint: str) -> Dict:
+        """GET with a short per-endpoint TTL (see CACHE_TTL)"""
+        now = time.monotonic()
+        entry = self.cache.get(endpoint)
+        if entry is not None and now < entry[0]:
+            return entry[1]
+
+        result = self._make_request("GET", endpoint)
+        if result is not None:
+            self.cache[endpoint] = (now + self.CACHE_TTL[endpoint], result)
+        return result
+
     def check_health(self) -> Dict:
         """Check DeepStream pipeline health"""
-        return self._make_request("GET", "/health/get-dsready-state")
+        return self._cached_get("/health/get-dsready-state")
 
     def get_streams(self) -> Dict:
         """Get all active streams"""
-        return self._make_request("GET", "/stream/get-stream-info")
+        return self._cached_get("/stream/get-stream-info")
 
     # Stream management
     def add_stream(self, camera_id: str, camera_name: str, rtsp_url: str,
                    resolution: str = "1920x1080", codec: str = "h264",
                    framerate: int = 10, protocol: str = "tcp") -> Dict:
         """Add a new video stream"""
-        payload = {
-            "key": "sensor",
-            "value": {
-                "camera_id": camera_id,
-                "camera_name": camera_name,
-                "camera_url": rtsp_url,
-                "change": "camera_add",
-                "metadata": {
-                    "resolution": resolution,
-                    "codec": codec,
-                    "framerate": framerate,
-                }
-            },
-            "headers": {
-                "source": "python_client",
-                "created_at": datetime.now(UTC).isoformat() + "Z"
-            }
-        }
-
-        return self._make_request("POST", "/stream/add", payload)
+        payload = build_add_payload(camera_id, camera_name, rtsp_url, resolution, codec, framerate)
+        result = self._make_request("POST", "/stream/add", payload)
+        if result is not None:
+            self.cache.pop("/stream/get-stream-info", None)
+        return result
 
     def remove_stream(self, camera_id: str, rtsp_url: str) -> Dict:
         """Remove a video stream"""
-        payload = {
-            "key": "sensor",
-            "value": {
-                "camera_id": camera_id,
-                "camera_url": rtsp_url,
-                "change": "camera_remove"
-            },
-            "headers": {
-                "source": "python_client",
-                "created_at": datetime.now(UTC).isoformat() + "Z"
-            }
-        }
-
-        return self._make_request("POST", "/stream/remove", payload)
+        payload = build_remove_payload(camera_id, rtsp_url)
+        result = self._make_request("POST", "/stream/remove", payload)
+        if result is not None:
+            self.cache.pop("/stream/get-stream-info", None)
+        return result
 
     # INFERENCE SETTINGS
     def set_inference_interval(self, stream_id: str, interval: int) -> Dict:
@@ -121,7 +296,7 @@ class DeepStreamRESTClient:
             (1): - Decoder will decode only non-reference frames of the encoded bitstream
             (2): - Decoder will decode only key frames of the encoded bitstream
         """
-        if skip_frames not in [0, 1, 2]:
+        if skip_frames not in SKIP_FRAMES_VALUES:
             raise ValueError("Invalid skip_frames value. Must be 0 (all), 1 (non-ref), or 2 (key).")
         payload = {
             "stream" : {
@@ -134,7 +309,7 @@ class DeepStreamRESTClient:
     # ENCODER API
     def force_idr(self, stream_id: str, force_idr: int) -> Dict:
         """Force IDR frame generation on encoder"""
-        if force_idr not in [0, 1]:
+        if force_idr not in BINARY_VALUES:
             raise ValueError("Invalid force_idr value. Must be 0 (disable) or 1 (enable).")
         
         payload = {
@@ -143,11 +318,11 @@ class DeepStreamRESTClient:
                 "force_idr": force_idr
             }
         }
-        return self._make_request("POST", "/enc/force-idr", payload)
+        return self._make_request("POST", "/enc/force-idr", payload, parse_response=False)
     
     def force_intra(self, stream_id: str, force_intra: int) -> Dict:
         """Force Intra frame"""
-        if force_intra not in [0, 1]:
+        if force_intra not in BINARY_VALUES:
             raise ValueError("Invalid force_intra value. Must be 0 (disable) or 1 (enable).")
         
         payload = {
@@ -156,7 +331,7 @@ class DeepStreamRESTClient:
                 "force_intra": force_intra
             }
         }
-        return self._make_request("POST", "/enc/force-intra", payload)
+        return self._make_request("POST", "/enc/force-intra", payload, parse_response=False)
 
     def set_encoder_bitrate(self, stream_id: str, bitrate: int) -> Dict:
         """Set encoder bitrate"""
@@ -166,7 +341,7 @@ class DeepStreamRESTClient:
                 "bitrate": bitrate
             }
         }
-        return self._make_request("POST", "/enc/bitrate", payload)
+        return self._make_request("POST", "/enc/bitrate", payload, parse_response=False)
     
     def iframe_interval(self, stream_id: str, iframe_interval: int) -> Dict:
         """Set I-frame interval for encoder"""
@@ -198,14 +373,14 @@ class DeepStreamRESTClient:
                 "batches_push_timeout": time_in_ms
             }
         }
-        return self._make_request("POST", "/mux/batched-push-timeout", payload)
+        return self._make_request("POST", "/mux/batched-push-timeout", payload, parse_response=False)
     
     # OSD API
     def change_process_mode(self, stream_id: str, mode: int) -> Dict:
         """Change OSD process mode. 
             0 and 1, 0=CPU mode, 1=GPU mode"""
             
-        if mode != 0 and mode != 1:
+        if mode not in BINARY_VALUES:
             raise ValueError("Invalid mode value. Must be 0 (CPU) or 1 (GPU).")
         
         payload = {
@@ -215,7 +390,115 @@ class DeepStreamRESTClient:
             }
         }
         return self._make_request("POST", "/osd/process-mode", payload)
-    
+
+
+class AsyncDeepStreamRESTClient:
+    """
+    asyncio counterpart of DeepStreamRESTClient for bulk stream operations.
+    Requests share one keep-alive connector and run concurrently, so adding
+    N cameras costs roughly one round trip instead of N.
+
+    Usage:
+        async with AsyncDeepStreamRESTClient(port=9000) as client:
+            await client.bulk_add(cameras)
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 9002, max_connections: int = 64):
+        self.base_url = f"http://{host}:{port}"
+        self.api_version = "v1"
+        self.api_root = f"{self.base_url}/api/{self.api_version}"
+        self.max_connections = max_connections
+        self.session = None
+
+    async def __aenter__(self):
+        if aiohttp is None:
+            raise ImportError(
+                "aiohttp package not found. "
+                "Install with: pip install aiohttp"
+            )
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+            headers={"Content-Type": "application/json"}
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+    async def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict[str, Any]:
+        """Make HTTP request to DeepStream REST API"""
+        url = self.api_root + endpoint
+
+        try:
+            body = None if data is None else encode_json(data)
+            async with self.session.request(method, url, data=body) as response:
+                if response.status >= 400:
+                    print(f"Error communicating with {self.base_url}: HTTP {response.status} for {url}")
+                    print(f"Response: {await response.text()}")
+                    return None
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            # Report per call like the sync client, so one bad response or timeout
+            # doesn't abort every other request in a bulk_add gather
+            print(f"Error communicating with {self.base_url}: {str(e) or type(e).__name__}")
+            return None
+
+    async def check_health(self) -> Dict:
+        """Check DeepStream pipeline health"""
+        return await self._make_request("GET", "/health/get-dsready-state")
+
+    async def add_stream(self, camera_id: str, camera_name: str, rtsp_url: str,
+                         resolution: str = "1920x1080", codec: str = "h264",
+                         framerate: int = 10) -> Dict:
+        """Add a new video stream"""
+        payload = build_add_payload(camera_id, camera_name, rtsp_url, resolution, codec, framerate)
+        return await self._make_request("POST", "/stream/add", payload)
+
+    async def remove_stream(self, camera_id: str, rtsp_url: str) -> Dict:
+        """Remove a video stream"""
+        payload = build_remove_payload(camera_id, rtsp_url)
+        return await self._make_request("POST", "/stream/remove", payload)
+
+    async def bulk_add(self, cameras: Iterable[Dict]) -> list:
+        """Add many streams concurrently. Each camera is a dict of add_stream keyword arguments."""
+        return await asyncio.gather(*(self.add_stream(**cam) for cam in cameras))
+
+
+async def bulk_add_streams(host: str, port: int, cameras: Iterable[Dict],
+                           max_connections: int = 64) -> list:
+    """Open an async client, add all cameras concurrently and close it"""
+    async with AsyncDeepStreamRESTClient(host=host, port=port, max_connections=max_connections) as client:
+        return await client.bulk_add(cameras)
+
+
+def load_cameras(path: str) -> list:
+    """Read a bulk-add camera file into add_stream keyword arguments"""
+    with open(path) as f:
+        return [
+            {"camera_id": cam["id"], "camera_name": cam["name"], "rtsp_url": cam["url"]}
+            for cam in json.load(f)
+        ]
+
+
+# CLI subcommand -> handler(args, client)
+COMMANDS = {
+    "health": lambda a, c: c.check_health(),
+    "list": lambda a, c: c.get_streams(),
+    "add": lambda a, c: c.add_stream(a.id, a.name, a.stream_url),
+    "bulk-add": lambda a, c: asyncio.run(bulk_add_streams(a.host, a.port, load_cameras(a.file))),
+    "remove": lambda a, c: c.remove_stream(a.id, a.stream_url),
+    "interval": lambda a, c: c.set_inference_interval(a.stream, a.value),
+    "drop-interval": lambda a, c: c.drop_frame_interval(a.stream, a.value),
+    "skip-frames": lambda a, c: c.skip_frames(a.stream, a.value),
+    "force-idr": lambda a, c: c.force_idr(a.stream, a.value),
+    "force-intra": lambda a, c: c.force_intra(a.stream, a.value),
+    "iframe-interval": lambda a, c: c.iframe_interval(a.stream, a.value),
+    "bitrate": lambda a, c: c.set_encoder_bitrate(a.stream, a.value),
+    "mux-timeout": lambda a, c: c.set_batched_push_timeout(a.value),
+    "osd-mode": lambda a, c: c.change_process_mode(a.stream, a.mode),
+    "roi": lambda a, c: c.update_roi(a.stream, a.roi),
+}
+
 
 def main():
     parser = argparse.ArgumentParser(description="DeepStream REST API Client")
@@ -239,6 +522,11 @@ def main():
     add_parser.add_argument("--protocol", default="tcp", choices=["tcp", "udp"],
                             help="RTSP protocol (default: tcp)")
 
+    # Add many streams concurrently
+    bulk_add_parser = subparsers.add_parser("bulk-add", help="Add many streams concurrently")
+    bulk_add_parser.add_argument("--file", required=True,
+                                 help='JSON file with a list of cameras: [{"id": ..., "name": ..., "url": ...}, ...]')
+
     # Remove stream
     remove_parser = subparsers.add_parser("remove", help="Remove a stream")
     remove_parser.add_argument("--id", required=True, help="Camera ID")
@@ -283,7 +571,7 @@ def main():
     # Update ROI
     roi_parser = subparsers.add_parser("roi", help="Update Region of Interest")
     roi_parser.add_argument("--stream", default="0", help="Stream ID")
-    roi_parser.add_argument("--roi", type=list, required=True,
+    roi_parser.add_argument("--roi", type=json.loads, required=True,
                             help="""ROI list in format: [{
                                     "roi_id": "0", 
                                     "left": x1, 
@@ -308,71 +596,16 @@ def main():
     osd_parser = subparsers.add_parser("osd-mode", help="Change OSD process mode")
     osd_parser.add_argument("--stream", default="0", help="Stream ID")
     osd_parser.add_argument("--mode", type=int, choices=[0, 1], required=True, help="Process mode (0=CPU, 1=GPU)")
-    
-    parser.add_argument("-h", "--help", action="help", help="Show this help message and exit")
 
     args = parser.parse_args()
 
-    client = DeepStreamRESTClient(host=args.host, port=args.port)
-
-    if args.command == "health":
-        result = client.check_health()
-        print(json.dumps(result, indent=2))
-
-    elif args.command == "list":
-        result = client.get_streams()
-        print(json.dumps(result, indent=2))
-
-    elif args.command == "add":
-        result = client.add_stream(args.id, args.name, args.stream_url)
-        print(json.dumps(result, indent=2))
-
-    elif args.command == "remove":
-        result = client.remove_stream(args.id, args.stream_url)
-        print(json.dumps(result, indent=2))
-
-    elif args.command == "interval":
-        result = client.set_inference_interval(args.stream, args.value)
-        print(json.dumps(result, indent=2))
-        
-    elif args.command == "drop-interval":
-        result = client.drop_frame_interval(args.stream, args.value)
-        print(json.dumps(result, indent=2))
-        
-    elif args.command == "skip-frames":
-        result = client.skip_frames(args.stream, args.value)
-        print(json.dumps(result, indent=2))
-        
-    elif args.command == "force-idr":
-        result = client.force_idr(args.stream, args.value)
-        print(json.dumps(result, indent=2))
-        
-    elif args.command == "force-intra":
-        result = client.force_intra(args.stream, args.value)
-        print(json.dumps(result, indent=2))
-        
-    elif args.command == "iframe-interval":
-        result = client.iframe_interval(args.stream, args.value)
-        print(json.dumps(result, indent=2))
-        
-    elif args.command == "bitrate":
-        result = client.set_encoder_bitrate(args.stream, args.value)
-        print(json.dumps(result, indent=2))
-
-    elif args.command == "mux-timeout":
-        result = client.set_mux_timeout(args.value)
-        print(json.dumps(result, indent=2))
-
-    elif args.command == "osd-mode":
-        result = client.set_osd_mode(args.stream, args.mode)
-        print(json.dumps(result, indent=2))
-        
-    elif args.command == "roi":
-        result = client.update_roi(args.stream, args.roi)
-        print(json.dumps(result, indent=2))
-
-    else:
+    command = COMMANDS.get(args.command)
+    if command is None:
         parser.print_help()
+        return
+
+    with DeepStreamRESTClient(host=args.host, port=args.port) as client:
+        emit_json(command(args, client))
 
 
 if __name__ == "__main__":
@@ -1,88 +1,102 @@
-import subprocess
 import time
 import sys
+import os
 import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rest_api_client import DeepStreamRESTClient, bulk_add_streams, aiohttp
 
 # Configuration
 
-def run_command(cmd_list):
-    """Executes a shell command provided as a list."""
-    try:
-        # Check if rest_api_client.py exists to avoid confusing errors
-        result = subprocess.run(cmd_list, capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"Success: {result.stdout.strip()}")
+def build_cameras(args):
+    """Returns the (camera_id, camera_name, url) list to add, in order."""
+    cameras = []
+
+    # 1. The First Stream (File Source), only when starting from 1
+    if args.start_from == 1:
+        cameras.append(("cam000", "Front Door File",
+                        "file:///workspace/test-media/sample_1080p_h264_15fps.mp4"))
+
+    # 2. RTSP / SRT Streams
+    for i in range(args.start_from, args.max_streams + 1):
+        # Format ID: cam0001, cam0002...
+        cam_id = f"cam{i:04d}"
+        if 'rtsp' in args.mode:
+            stream_url = f"rtsp://mediamtx:8554/stream{i}"
         else:
-            print(f"Error: {result.stderr.strip()}")
-    except FileNotFoundError:
-        print("Error: 'rest_api_client.py' not found. Make sure it is in this folder.")
-        sys.exit(1)
+            stream_url = f"srt://mediamtx:8890?streamid=read:stream{i}"
+        cameras.append((cam_id, f"Front Door {i}", stream_url))
+
+    return cameras
+
+def add_sequential(cameras, args):
+    """Adds streams one at a time over one session.
+    Each add starts as soon as the previous one is acknowledged; a throttled (429/503)
+    add is retried with backoff by the client, --sleep_time only adds a fixed gap on top."""
+    with DeepStreamRESTClient(host=args.host, port=args.port) as client:
+        # Open the pooled connection up front so the first add doesn't pay the handshake
+        client.check_health()
+        for n, (cam_id, name, stream_url) in enumerate(cameras, 1):
+            print(f"Adding Stream {n}/{len(cameras)} ({cam_id})...")
+            result = client.add_stream(cam_id, name, stream_url)
+            print(f"{'Success' if result is not None else 'Error'}: {cam_id}")
+            if args.sleep_time > 0:
+                time.sleep(args.sleep_time)
+
+def add_threaded(cameras, args):
+    """Adds streams from a thread pool sharing one client's connection pool, logging each as it completes."""
+    with DeepStreamRESTClient(host=args.host, port=args.port) as client, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        client.check_health()
+        futures = {executor.submit(client.add_stream, cam_id, name, stream_url): cam_id
+                   for cam_id, name, stream_url in cameras}
+        for n, future in enumerate(as_completed(futures), 1):
+            cam_id = futures[future]
+            print(f"[{n}/{len(cameras)}] {'Success' if future.result() is not None else 'Error'}: {cam_id}")
+
+def add_concurrent(cameras, args):
+    """Adds all streams over one pooled async client, at most --concurrency in flight."""
+    if aiohttp is None:
+        # No async client available, fall back to threads over the blocking client
+        add_threaded(cameras, args)
+        return
+
+    print(f"Adding {len(cameras)} streams with concurrency {args.concurrency}...")
+    results = asyncio.run(bulk_add_streams(
+        args.host, args.port,
+        [{"camera_id": c, "camera_name": n, "rtsp_url": u} for c, n, u in cameras],
+        max_connections=args.concurrency,
+    ))
+    for (cam_id, _, _), result in zip(cameras, results):
+        print(f"{'Success' if result is not None else 'Error'}: {cam_id}")
 
 def main():
-    parser = argparse.ArgumentParser(description="Add multiple streams using rest_api_client.py")
+    parser = argparse.ArgumentParser(description="Add multiple streams using DeepStreamRESTClient")
+    parser.add_argument("--host", default="localhost", help="Pipeline host (default: localhost)")
+    parser.add_argument("--port", type=int, default=9002, help="Pipeline REST port (default: 9002)")
     parser.add_argument("--max_streams", type=int, default=10, help="Maximum number of streams to add")
-    parser.add_argument("--sleep_time", type=int, default=1, help="Sleep time between adding streams")
+    parser.add_argument("--sleep_time", type=float, default=0,
+                        help="Extra sleep time between adding streams (default: 0, pace on server responses)")
     parser.add_argument("--mode", choices=['rtsp-h264', 'rtsp-h265', 'srt-h264', 'srt-h265'],
                         default='srt-h264',
                         help="Protocol + codec (default: srt-h264)")
     parser.add_argument("--start_from", type=int, default=1, help="Starting stream number")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="Add streams concurrently with this many requests in flight "
+                             "(default: 0, one at a time)")
     args = parser.parse_args()
 
     print("--- Starting Stream Addition Sequence ---")
 
-    # 1. Add the First Stream (File Source)
-    print("Adding Initial File Stream (cam001)...")
-    base_cmd = ["python3", "rest_api_client.py", "add"]
-    
-    if args.start_from == 1:
-        # only run if starting from 1
-        initial_args = [
-            "--id", "cam000",
-            "--name", "Front Door File",
-            "--url", "file:///workspace/test-media/sample_1080p_h264_15fps.mp4"
-        ]
-        run_command(base_cmd + initial_args)
-        
-        time.sleep(args.sleep_time)
-
-    # 2. Add RTSP Streams Loop
-    if 'rtsp' in args.mode:
-        print("Adding RTSP Streams...") 
-        for i in range(args.start_from, args.max_streams + 1):
-            # Format ID: cam0001, cam0002...
-            cam_id = f"cam{i:04d}"
-            stream_url = f"rtsp://mediamtx:8554/stream{i}"
-            
-            print(f"Adding RTSP Stream {i}/{args.max_streams} ({cam_id})...")
-            
-            loop_args = [
-                "--id", cam_id,
-                "--name", f"Front Door {i}",
-                "--url", stream_url
-            ]
-            
-            run_command(base_cmd + loop_args)
-            time.sleep(args.sleep_time)
-
-    elif 'srt' in args.mode:
-        print("Adding SRT Streams...") 
-        for i in range(args.start_from, args.max_streams + 1):
-            # Format ID: cam0001, cam0002...
-            cam_id = f"cam{i:04d}"
-            stream_url = f"srt://mediamtx:8890?streamid=read:stream{i}"
-            
-            print(f"Adding SRT Stream {i}/{args.max_streams} ({cam_id})...")
-            
-            loop_args = [
-                "--id", cam_id,
-                "--name", f"Front Door {i}",
-                "--url", stream_url
-            ]
-            
-            run_command(base_cmd + loop_args)
-            time.sleep(args.sleep_time)
+    cameras = build_cameras(args)
+    if args.concurrency > 0:
+        add_concurrent(cameras, args)
+    else:
+        add_sequential(cameras, args)
 
     print("--- All streams added ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -5,15 +5,135 @@ Supports YOLOv5, YOLOv8, and YOLOv11 models with consistent interface
 """
 
 import argparse
+import errno
+import functools
+import gc
+import importlib.util
+import os
+import pickle
+import re
+import shutil
 import sys
+import traceback
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import torch
 
 
-# Add YOLOv5 to path if it exists
 YOLOV5_PATH = Path("/root/multipipeline-deepstream/lib/yolov5")
-if YOLOV5_PATH.exists():
-    sys.path.insert(0, str(YOLOV5_PATH))
+
+# Accepted --device values: cpu, a GPU index (0), cuda:N, or a GPU list (0,1)
+DEVICE_PATTERN = re.compile(r'^(?:cpu|cuda:(?P<cuda>\d+)|(?P<index>\d+)|\d+(?:,\d+)+)$')
+
+
+def add_yolov5_to_path():
+    """Make the YOLOv5 repo importable (export.py, models.*) if it exists"""
+    if YOLOV5_PATH.exists() and str(YOLOV5_PATH) not in sys.path:
+        sys.path.insert(0, str(YOLOV5_PATH))
+
+
+def load_torch():
+    """
+    Import torch on first use. It takes seconds to import and isn't needed for
+    --help, argument errors or version detection of zip-format checkpoints.
+    """
+    import torch
+    return torch
+
+
+def release_memory():
+    """Free model objects and cached CUDA memory once an export is done"""
+    gc.collect()
+    # Nothing to free on the GPU if no exporter has imported torch
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def move_file(source: Path, dest: Path):
+    """
+    Move an exported file. On the same filesystem this is a rename and no data is
+    copied; across filesystems the file is copied once (sendfile) and the source removed.
+    A hard link is no help here as it cannot cross filesystems either.
+    """
+    try:
+        os.replace(source, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.copyfile(source, dest)
+        os.unlink(source)
+
+
+class CheckpointStub:
+    """
+    Stand-in for every class referenced by a checkpoint pickle. Instances keep the
+    pickled attribute dict (e.g. a model's 'yaml') and the original module name,
+    but nothing from the checkpoint is imported or executed and no tensor is built.
+    """
+
+    stub_module = ""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            self.__dict__.update(state)
+
+    # Containers such as OrderedDict are rebuilt as stubs too; their items are not needed
+    def __setitem__(self, key, value):
+        pass
+
+    def append(self, item):
+        pass
+
+    def extend(self, items):
+        pass
+
+
+class CheckpointUnpickler(pickle.Unpickler):
+    """Unpickler that resolves every global to a CheckpointStub and drops tensor storages"""
+
+    def find_class(self, module, name):
+        return stub_class(module, name)
+
+    def persistent_load(self, pid):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def stub_class(module: str, name: str) -> type:
+    return type(name, (CheckpointStub,), {"stub_module": module})
+
+
+def peek_checkpoint(model_path: str):
+    """
+    Read the object tree of a zip-format .pt checkpoint without loading tensor data.
+    Only the small data.pkl record is decompressed; the weight records are never touched.
+    """
+    with zipfile.ZipFile(model_path) as archive:
+        records = [n for n in archive.namelist() if n == 'data.pkl' or n.endswith('/data.pkl')]
+        if len(records) != 1:
+            raise ValueError(f"Unexpected checkpoint layout in {model_path}")
+        with archive.open(records[0]) as f:
+            return CheckpointUnpickler(f).load()
+
+
+def load_checkpoint_mmap(model_path: str):
+    """
+    Full torch.load for zip checkpoints that peek_checkpoint can't read. Tensors are
+    memory-mapped from the file instead of copied into RAM. YOLO checkpoints pickle
+    the model class itself, so weights_only loading would always reject them; the
+    file is a local checkpoint the user asked to convert.
+    """
+    add_yolov5_to_path()
+    torch = load_torch()
+    try:
+        return torch.load(model_path, map_location='cpu', mmap=True, weights_only=False)
+    except TypeError:
+        # torch < 2.1 has no mmap argument
+        return torch.load(model_path, map_location='cpu')
 
 
 def detect_yolo_version(model_path: str) -> str:
@@ -26,14 +146,34 @@ def detect_yolo_version(model_path: str) -> str:
     Returns:
         Version string: 'yolov5', 'yolov8', 'yolov11', or 'ultralytics'
     """
+    # Keyed on mtime so a checkpoint rewritten in place is inspected again
+    return detect_checkpoint_version(model_path, os.stat(model_path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=64)
+def detect_checkpoint_version(model_path: str, mtime_ns: int) -> str:
+    """Cached body of detect_yolo_version for one (path, mtime) pair"""
     try:
-        # Try loading with torch to check model structure
-        ckpt = torch.load(model_path, map_location='cpu')
+        if zipfile.is_zipfile(model_path):
+            # Only the pickled structure is needed, not the weights
+            try:
+                ckpt = peek_checkpoint(model_path)
+            except (ValueError, pickle.UnpicklingError):
+                ckpt = load_checkpoint_mmap(model_path)
+        else:
+            # Legacy (pre torch 1.6) serialization has no separate structure
+            # record and can't be memory-mapped
+            add_yolov5_to_path()
+            ckpt = load_torch().load(model_path, map_location='cpu')
         
         # Check for version indicators in the checkpoint
         if 'model' in ckpt:
-            # YOLOv5 typically has 'model' key with yaml attribute
             model_info = ckpt.get('model', None)
+            # Ultralytics (v8/v11) models are pickled from the ultralytics package
+            model_module = getattr(model_info, 'stub_module', None) or type(model_info).__module__
+            if model_module.startswith('ultralytics'):
+                return 'ultralytics'
+            # YOLOv5 typically has 'model' key with yaml attribute
             if hasattr(model_info, 'yaml') or 'yaml' in ckpt:
                 return 'yolov5'
         
@@ -89,6 +229,7 @@ def export_yolov5_to_onnx(
     Returns:
         Path to exported ONNX model
     """
+    add_yolov5_to_path()
     try:
         from export import run as yolov5_export
     except ImportError:
@@ -116,6 +257,8 @@ def export_yolov5_to_onnx(
     
     # Run YOLOv5 export
     exported_files = yolov5_export(**export_args)
+    # The model is out of scope now; return its VRAM before any follow-up (e.g. TensorRT build)
+    release_memory()
     
     if not exported_files:
         raise RuntimeError("YOLOv5 export failed - no output files generated")
@@ -124,18 +267,36 @@ def export_yolov5_to_onnx(
     
     # Handle custom output path
     if output_path and result_path:
-        import shutil
         source = Path(result_path)
         dest = Path(output_path)
         if source != dest and source.exists():
             dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(str(source), str(dest))
+            move_file(source, dest)
             print(f"📦 Moved model to: {dest}")
             return str(dest)
     
     return result_path
 
 
+def parse_device(device):
+    """
+    Convert a --device value to the form ultralytics expects: 'cpu', a GPU index
+    as int, or a GPU list string like '0,1'. 'cuda:N' becomes N, so it is not
+    silently exported on cuda:0.
+    """
+    match = DEVICE_PATTERN.match(str(device).strip().lower())
+    if match is None:
+        raise ValueError(
+            f"Invalid device '{device}'. "
+            "Use 'cpu', a GPU index like '0', 'cuda:1', or a list like '0,1'"
+        )
+    
+    gpu = match.group('cuda') or match.group('index')
+    if gpu is not None:
+        return int(gpu)
+    return match.group(0)
+
+
 def export_ultralytics_to_onnx(
     model_path: str,
     output_path: str = None,
@@ -181,12 +342,8 @@ def export_ultralytics_to_onnx(
     model = ultralytics.YOLO(model_path)
     
     # Convert device to ultralytics format
-    if isinstance(device, str) and device.lower() == 'cpu':
-        device_id = 'cpu'
-    elif isinstance(device, str) and device.isdigit():
-        device_id = int(device)
-    else:
-        device_id = device
+    device_id = parse_device(device)
+    print(f"🖥️  Export device: {device_id}")
     
     # Export model
     export_path = model.export(
@@ -200,23 +357,88 @@ def export_ultralytics_to_onnx(
         batch=batch_size
     )
     
+    # Free the PyTorch model's VRAM before any follow-up (e.g. TensorRT build)
+    del model
+    release_memory()
+    
     if not export_path:
         raise RuntimeError("Ultralytics export failed - no output file generated")
     
     # Handle custom output path
     if output_path and export_path:
-        import shutil
         source = Path(export_path)
         dest = Path(output_path)
         if source != dest and source.exists():
             dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(str(source), str(dest))
+            move_file(source, dest)
             print(f"📦 Moved model to: {dest}")
             return str(dest)
     
     return export_path
 
 
+def save_external_data(onnx_path: str) -> str:
+    """
+    Rewrite an ONNX model with its weights in a side file (<name>.onnx.data).
+    The .onnx itself shrinks to the graph, so tools that only parse the graph stay light,
+    and models over protobuf's 2 GB limit become loadable. Keep both files together.
+    
+    Args:
+        onnx_path: Path to the exported ONNX model (rewritten in place)
+        
+    Returns:
+        Path to the weights file
+    """
+    try:
+        import onnx
+    except ImportError:
+        raise ImportError(
+            "onnx package not found. "
+            "Install with: pip install onnx"
+        )
+    
+    data_name = Path(onnx_path).name + ".data"
+    data_path = Path(onnx_path).with_name(data_name)
+    model = onnx.load(onnx_path)
+    # onnx appends to an existing location file, so drop weights from a previous run
+    data_path.unlink(missing_ok=True)
+    onnx.save_model(
+        model,
+        onnx_path,
+        save_as_external_data=True,
+        all_tensors_to_one_file=True,
+        location=data_name,
+        size_threshold=1024
+    )
+    del model
+    
+    print(f"📦 Weights saved to: {data_path}")
+    return str(data_path)
+
+
+def simplify_onnx(onnx_path: str, external_data: bool = False):
+    """
+    Simplify an exported ONNX model in place with onnxslim, the same pass the
+    ultralytics exporter runs for simplify=True. Used to simplify one model while
+    the next exports.
+    
+    Args:
+        onnx_path: Path to the exported ONNX model
+        external_data: Move weights to a side file afterwards (see save_external_data)
+    """
+    try:
+        import onnxslim
+    except ImportError:
+        raise ImportError(
+            "onnxslim package not found. "
+            "Install with: pip install onnxslim"
+        )
+    
+    onnxslim.slim(str(onnx_path), str(onnx_path))
+    if external_data:
+        save_external_data(str(onnx_path))
+
+
 def export_yolo_to_onnx(
     model_path: str,
     output_path: str = None,
@@ -227,7 +449,8 @@ def export_yolo_to_onnx(
     half: bool = False,
     device: str = 'cpu',
     batch_size: int = 1,
-    version: str = 'auto'
+    version: str = 'auto',
+    external_data: bool = False
 ):
     """
     Universal YOLO to ONNX converter supporting YOLOv5, YOLOv8, and YOLOv11
@@ -243,6 +466,7 @@ def export_yolo_to_onnx(
         device: Device ('cpu' or GPU index like '0', '1')
         batch_size: Batch size for export
         version: YOLO version ('auto', 'yolov5', 'yolov8', 'yolov11', 'ultralytics')
+        external_data: Store weights in a separate <name>.onnx.data file
     
     Returns:
         Path to exported ONNX model
@@ -260,12 +484,20 @@ def export_yolo_to_onnx(
     else:
         print(f"📌 Using specified version: {version.upper()}")
     
+    # TensorRT picks shape-specific kernels, so a fixed shape at the deployment batch is fastest
+    if dynamic:
+        if batch_size == 1:
+            print("⚠️  Warning: --dynamic with batch size 1 is likely wrong for TensorRT;")
+            print("   pass --batch-size <max batch>, or drop --dynamic to export a static shape")
+    else:
+        print(f"📐 Static input shape: {batch_size}x3x{img_size[0]}x{img_size[1]}")
+    
     # Normalize device parameter for both exporters
     device_str = str(device).lower()
     
     # Route to appropriate export function
     if version == 'yolov5':
-        return export_yolov5_to_onnx(
+        result_path = export_yolov5_to_onnx(
             model_path=model_path,
             output_path=output_path,
             img_size=img_size,
@@ -277,7 +509,7 @@ def export_yolo_to_onnx(
             batch_size=batch_size
         )
     else:  # yolov8, yolov11, or ultralytics
-        return export_ultralytics_to_onnx(
+        result_path = export_ultralytics_to_onnx(
             model_path=model_path,
             output_path=output_path,
             img_size=img_size,
@@ -288,6 +520,33 @@ def export_yolo_to_onnx(
             device=device_str,
             batch_size=batch_size
         )
+    
+    # After any move to output_path, so the weights file lands next to the final .onnx
+    if external_data:
+        save_external_data(str(result_path))
+    
+    return result_path
+
+
+def print_export_success(output_file: str):
+    output_path = Path(output_file)
+    file_size_mb = output_path.stat().st_size / (1024 * 1024)
+    
+    print(f"\n{'='*60}")
+    print(f"✅ Export completed successfully!")
+    print(f"{'='*60}")
+    print(f"📁 Output file: {output_file}")
+    print(f"📊 File size:   {file_size_mb:.2f} MB")
+    print(f"{'='*60}\n")
+
+
+def print_export_failure(model_path: str, error: Exception):
+    print(f"\n{'='*60}")
+    print(f"❌ Export failed: {model_path}")
+    print(f"{'='*60}")
+    print(f"Error: {str(error)}")
+    print(f"{'='*60}\n")
+    traceback.print_exception(error)
 
 
 def main():
@@ -310,14 +569,19 @@ Examples:
   
   # Force specific YOLO version
   python unified_yolo_converter.py model.pt --version yolov5
+  
+  # Export several models in one run (torch/ultralytics are imported once)
+  python unified_yolo_converter.py models/*.pt --device 0
         """
     )
     
     # Required arguments
     parser.add_argument(
-        "model_path",
+        "model_paths",
         type=str,
-        help="Path to the YOLO .pt model file"
+        nargs="+",
+        metavar="model_path",
+        help="Path(s) to the YOLO .pt model file(s)"
     )
     
     # Optional arguments
@@ -325,7 +589,7 @@ Examples:
         "-o", "--output",
         type=str,
         default=None,
-        help="Custom output path for ONNX model (default: same directory as input)"
+        help="Custom output path for ONNX model, single model only (default: same directory as input)"
     )
     
     parser.add_argument(
@@ -381,7 +645,13 @@ Examples:
         "--device",
         type=str,
         default="cpu",
-        help="Device to use: 'cpu', '0', '1', etc. (default: cpu)"
+        help="Device to use: 'cpu', '0', 'cuda:1', '0,1', etc. (default: cpu)"
+    )
+    
+    parser.add_argument(
+        "--external-data",
+        action="store_true",
+        help="Store weights in a separate <name>.onnx.data file next to the model"
     )
     
     parser.add_argument(
@@ -394,11 +664,14 @@ Examples:
     
     args = parser.parse_args()
     
+    if args.output and len(args.model_paths) > 1:
+        parser.error("-o/--output can only be used when exporting a single model")
+    
     # Print configuration
     print("\n" + "="*60)
     print("🎯 Universal YOLO to ONNX Converter")
     print("="*60)
-    print(f"📄 Model Path:     {args.model_path}")
+    print(f"📄 Model Path:     {', '.join(args.model_paths)}")
     print(f"💾 Output Path:    {args.output or 'Auto (same directory)'}")
     print(f"📐 Image Size:     {args.img_size[0]}x{args.img_size[1]}")
     print(f"📦 Batch Size:     {args.batch_size}")
@@ -408,42 +681,75 @@ Examples:
     print(f"⚡ Half Precision: {args.half}")
     print(f"🖥️  Device:         {args.device}")
     print(f"🏷️  Version:        {args.version}")
+    print(f"🗂️  External Data:  {args.external_data}")
     print("="*60 + "\n")
     
-    try:
-        # Export model
-        output_file = export_yolo_to_onnx(
-            model_path=args.model_path,
-            output_path=args.output,
-            img_size=tuple(args.img_size),
-            opset=args.opset,
-            simplify=args.simplify,
-            dynamic=args.dynamic,
-            half=args.half,
-            device=args.device,
-            batch_size=args.batch_size,
-            version=args.version
-        )
-        
-        # Success message
-        output_path = Path(output_file)
-        file_size_mb = output_path.stat().st_size / (1024 * 1024)
-        
-        print(f"\n{'='*60}")
-        print(f"✅ Export completed successfully!")
-        print(f"{'='*60}")
-        print(f"📁 Output file: {output_file}")
-        print(f"📊 File size:   {file_size_mb:.2f} MB")
-        print(f"{'='*60}\n")
+    # With several models, simplify (CPU) each ultralytics ONNX on a worker thread
+    # while the next model exports, instead of inside the exporter. Needs onnxslim
+    # up front: with simplify=False the exporter won't install it. YOLOv5 uses its
+    # own simplifier, so those models keep the built-in pass.
+    background_simplify = (
+        args.simplify
+        and len(args.model_paths) > 1
+        and importlib.util.find_spec("onnxslim") is not None
+    )
+    simplifier = ThreadPoolExecutor(max_workers=1) if background_simplify else None
+    simplifying = []
+    
+    failed = []
+    for model_path in args.model_paths:
+        try:
+            simplify_later = background_simplify
+            if simplify_later:
+                # Detection is cached, so the exporter's own detect is free
+                version = args.version
+                if version == 'auto':
+                    version = detect_yolo_version(model_path)
+                simplify_later = version != 'yolov5'
+            
+            # Export model
+            output_file = export_yolo_to_onnx(
+                model_path=model_path,
+                output_path=args.output,
+                img_size=tuple(args.img_size),
+                opset=args.opset,
+                simplify=args.simplify and not simplify_later,
+                dynamic=args.dynamic,
+                half=args.half,
+                device=args.device,
+                batch_size=args.batch_size,
+                version=args.version,
+                external_data=args.external_data and not simplify_later
+            )
+            
+            if simplify_later:
+                print(f"🎨 Simplifying in background: {output_file}\n")
+                simplifying.append((
+                    model_path, output_file,
+                    simplifier.submit(simplify_onnx, output_file, args.external_data)
+                ))
+            else:
+                print_export_success(output_file)
+            
+        except Exception as e:
+            print_export_failure(model_path, e)
+            failed.append(model_path)
         
-    except Exception as e:
-        print(f"\n{'='*60}")
-        print(f"❌ Export failed!")
-        print(f"{'='*60}")
-        print(f"Error: {str(e)}")
-        print(f"{'='*60}\n")
-        import traceback
-        traceback.print_exc()
+        finally:
+            release_memory()
+    
+    for model_path, output_file, future in simplifying:
+        try:
+            future.result()
+            print_export_success(output_file)
+        except Exception as e:
+            print_export_failure(model_path, e)
+            failed.append(model_path)
+    if simplifier is not None:
+        simplifier.shutdown()
+    
+    if failed:
+        print(f"❌ {len(failed)}/{len(args.model_paths)} export(s) failed: {', '.join(failed)}")
         sys.exit(1)
 
 
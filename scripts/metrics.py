@@ -1,6 +1,7 @@
 import psutil
 import pynvml
-from datetime import datetime
+import time
+from functools import lru_cache
 
 # Configuration
 GPU_INDEX = 0    
@@ -9,22 +10,52 @@ GPU_INDEX = 0
 pynvml.nvmlInit()
 handle = pynvml.nvmlDeviceGetHandleByIndex(GPU_INDEX)
 
+# NVML / psutil entry points bound once, performance_metrics() may be polled at a high rate
+get_utilization = pynvml.nvmlDeviceGetUtilizationRates
+get_memory_info = pynvml.nvmlDeviceGetMemoryInfo
+get_power_usage = pynvml.nvmlDeviceGetPowerUsage
+get_temperature = pynvml.nvmlDeviceGetTemperature
+get_compute_processes = pynvml.nvmlDeviceGetComputeRunningProcesses
+NVMLError = pynvml.NVMLError
+NVML_TEMPERATURE_GPU = pynvml.NVML_TEMPERATURE_GPU
+cpu_percent_sample = psutil.cpu_percent
+virtual_memory = psutil.virtual_memory
+
+BYTES_PER_GB = 1024 ** 3
+
+
+def utc_timestamp():
+    """UTC time as ISO 8601 with microseconds, e.g. 2025-01-01T12:00:00.000000"""
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{nanos // 1000:06d}"
+
+
+@lru_cache(maxsize=4)
+def per_core_format(cores):
+    """"%.1f;%.1f;..." for the given core count, so all cores format in one % call"""
+    return ";".join(["%.1f"] * cores)
+
+
+def bytes_to_gb(b):
+    """Convert bytes to GB"""
+    return round(b / BYTES_PER_GB, 3) if b is not None else None
+
 
 def performance_metrics():
     """Return a dict with current metrics (memory values in GB)."""
-    ts = datetime.utcnow().isoformat()
+    ts = utc_timestamp()
     # GPU basic utilization and memory
-    util = pynvml.nvmlDeviceGetUtilizationRates(handle)
-    mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
+    util = get_utilization(handle)
+    mem_info = get_memory_info(handle)
     power_mw = None
     temp_c = None
     try:
-        power_mw = pynvml.nvmlDeviceGetPowerUsage(handle)  # milliwatts
-    except pynvml.NVMLError:
+        power_mw = get_power_usage(handle)  # milliwatts
+    except NVMLError:
         power_mw = None
     try:
-        temp_c = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
-    except pynvml.NVMLError:
+        temp_c = get_temperature(handle, NVML_TEMPERATURE_GPU)
+    except NVMLError:
         temp_c = None
 
     # GPU memory utilization percent (computed)
@@ -32,31 +63,29 @@ def performance_metrics():
     gpu_mem_total = mem_info.total
     gpu_mem_util_pct = (gpu_mem_used / gpu_mem_total * 100.0) if gpu_mem_total else None
 
-    # Convert bytes to GB
-    def _bytes_to_gb(b):
-        return round(b / (1024 ** 3), 3) if b is not None else None
-
-    gpu_mem_used_gb = _bytes_to_gb(gpu_mem_used)
-    gpu_mem_total_gb = _bytes_to_gb(gpu_mem_total)
+    gpu_mem_used_gb = bytes_to_gb(gpu_mem_used)
+    gpu_mem_total_gb = bytes_to_gb(gpu_mem_total)
 
     # CPU and system memory
-    cpu_percent = psutil.cpu_percent(interval=None)
-    cpu_per_core = psutil.cpu_percent(interval=None, percpu=True)
-    virtual_mem = psutil.virtual_memory()
+    # One per-core sample and the total derived from it: halves the /proc/stat reads
+    # and keeps the total consistent with the per-core values
+    cpu_per_core = cpu_percent_sample(interval=None, percpu=True)
+    cpu_percent = round(sum(cpu_per_core) / len(cpu_per_core), 1) if cpu_per_core else 0.0
+    virtual_mem = virtual_memory()
 
-    system_mem_total_gb = _bytes_to_gb(virtual_mem.total)
-    system_mem_used_gb = _bytes_to_gb(virtual_mem.used)
+    system_mem_total_gb = bytes_to_gb(virtual_mem.total)
+    system_mem_used_gb = bytes_to_gb(virtual_mem.used)
 
     # Optional: per-process GPU usage (requires NVML process query)
     processes = []
     try:
-        procs = pynvml.nvmlDeviceGetComputeRunningProcesses(handle)
+        procs = get_compute_processes(handle)
         for p in procs:
             processes.append({
                 "pid": p.pid,
                 "usedGpuMemory": getattr(p, "usedGpuMemory", None)
             })
-    except pynvml.NVMLError:
+    except NVMLError:
         processes = []
 
     return {
@@ -69,7 +98,7 @@ def performance_metrics():
         "gpu_power_mw": power_mw,
         "gpu_temp_c": temp_c,
         "cpu_total_pct": cpu_percent,
-        "cpu_per_core_pct": ";".join(f"{v:.1f}" for v in cpu_per_core),
+        "cpu_per_core_pct": per_core_format(len(cpu_per_core)) % tuple(cpu_per_core),
         "system_mem_total_gb": system_mem_total_gb,
         "system_mem_used_gb": system_mem_used_gb,
         "system_mem_percent": virtual_mem.percent,
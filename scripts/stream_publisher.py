@@ -1,72 +1,118 @@
 #!/usr/bin/env python3
 import subprocess
 import argparse
-import time
+import shutil
+import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 processes = []
 
-def publish(video_file, url_template, n, loop, mode):
+# Absolute path, resolved once: together with close_fds=False it lets subprocess
+# launch ffmpeg via posix_spawn instead of fork+exec of this process
+FFMPEG = shutil.which('ffmpeg') or 'ffmpeg'
+
+# ffmpeg argv per mode. LOOP, INPUT and URL are placeholders filled in per stream
+MODE_ARGV = {
+    'rtsp-h264': [
+        FFMPEG, '-re',
+        '-stream_loop', 'LOOP',
+        '-i', 'INPUT',
+        '-c:v', 'copy', '-c:a', 'copy',
+        '-f', 'rtsp',
+        '-rtsp_transport', 'tcp',
+        'URL'
+    ],
+    'rtsp-h265': [
+        FFMPEG, '-re',
+        '-stream_loop', 'LOOP',
+        '-i', 'INPUT',
+        '-c:v', 'hevc_nvenc',
+        '-preset', 'p4',
+        '-b:v', '2M',
+        '-bf', '0',
+        '-g', '60',
+        '-c:a', 'copy',
+        '-f', 'rtsp',
+        '-rtsp_transport', 'tcp',
+        'URL'
+    ],
+    'srt-h264': [
+        FFMPEG, '-re',
+        '-stream_loop', 'LOOP',
+        '-i', 'INPUT',
+        '-c:v', 'copy',
+        '-c:a', 'aac', '-b:a', '64k',
+        '-f', 'mpegts',
+        'URL'
+    ],
+    'srt-h265': [
+        FFMPEG, '-re',
+        '-stream_loop', 'LOOP',
+        '-i', 'INPUT',
+        '-c:v', 'hevc_nvenc',
+        '-preset', 'p4', '-b:v', '2M', '-bf', '0', '-g', '60',
+        '-c:a', 'aac', '-b:a', '64k',
+        '-f', 'mpegts',
+        'URL'
+    ],
+}
+
+def build_command(video_file, url, loop, mode):
+    template = MODE_ARGV.get(mode)
+    if template is None:
+        raise ValueError("Invalid mode")
+
+    # Placeholder positions come from the template, so a file name or URL can't be mistaken for one
+    cmd = template.copy()
+    cmd[template.index('LOOP')] = '-1' if loop else '0'
+    cmd[template.index('INPUT')] = video_file
+    cmd[template.index('URL')] = url
+    return cmd
+
+def build_tee_command(video_file, urls, loop, mode):
+    """One ffmpeg that reads (and for h265, encodes) the source once and fans out to every URL"""
+    cmd = build_command(video_file, "", loop, mode)
+
+    # Swap the single output (-f <format> [options] <url>) for a tee of all URLs
+    out = cmd.index('-f')
+    fmt = cmd[out + 1]
+    options = "rtsp_transport=tcp:" if fmt == 'rtsp' else ""
+    # onfail=ignore keeps the other outputs running if one sink drops
+    outputs = "|".join(f"[f={fmt}:{options}onfail=ignore]{url}" for url in urls)
+    return cmd[:out] + ['-map', '0:v:0', '-map', '0:a:0?', '-f', 'tee', outputs]
+
+def launch(cmd):
+    # stdin too, so ffmpeg doesn't read keystrokes from the terminal.
+    # close_fds=False is safe: Python opens its own fds non-inheritable
+    return subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            close_fds=False)
+
+def publish(video_file, url_template, n, loop, mode, tee=False):
+    cmds = []
+    urls = []
     for i in range(1, n+1):
         url = url_template.replace("{}", str(i))
+        urls.append(url)
+        cmds.append(build_command(video_file, url, loop, mode))
+        print(f"[{i:02d}] → {url}  ({mode})")
 
-        if mode == "rtsp-h264":
-            cmd = [
-                'ffmpeg', '-re',
-                '-stream_loop', '-1' if loop else '0',
-                '-i', video_file,
-                '-c:v', 'copy', '-c:a', 'copy',
-                '-f', 'rtsp',
-                '-rtsp_transport', 'tcp',
-                url
-            ]
-
-        elif mode == "rtsp-h265":
-            cmd = [
-                'ffmpeg', '-re',
-                '-stream_loop', '-1' if loop else '0',
-                '-i', video_file,
-                '-c:v', 'hevc_nvenc',
-                '-preset', 'p4',
-                '-b:v', '2M',
-                '-bf', '0',
-                '-g', '60',
-                '-c:a', 'copy',
-                '-f', 'rtsp',
-                '-rtsp_transport', 'tcp',
-                url
-            ]
-
-        elif "srt" in mode:
-            cmd = [
-                'ffmpeg', '-re',
-                '-stream_loop', '-1' if loop else '0',
-                '-i', video_file,
-                '-c:v', 'copy' if mode == 'srt-h264' else 'hevc_nvenc',
-            ]
-            
-            # Add encoding params only if transcoding
-            if mode == 'srt-h265':
-                cmd.extend(['-preset', 'p4', '-b:v', '2M', '-bf', '0', '-g', '60'])
-            
-            cmd.extend([
-                '-c:a', 'aac', '-b:a', '64k',
-                '-f', 'mpegts',
-                url
-            ])
-
-        else:
-            raise ValueError("Invalid mode")
+    if tee:
+        cmds = [build_tee_command(video_file, urls, loop, mode)]
 
-        print(f"[{i:02d}] → {url}  ({mode})")
-        p = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        processes.append(p)
-        time.sleep(0.25)
+    # The publishers are independent, so start them all at once
+    with ThreadPoolExecutor(max_workers=max(1, min(len(cmds), 16))) as executor:
+        processes.extend(executor.map(launch, cmds))
+
+    # Stop the streams on `kill` as well as Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
 
     print(f"\nAll {n} streams started in mode '{mode}'. Ctrl+C to stop.\n")
     try:
-        while True:
-            time.sleep(1)
+        # Block until the publishers exit (only happens with --no-loop) instead of polling
+        for p in processes:
+            p.wait()
     except KeyboardInterrupt:
         print("\nStopping all streams...")
         for p in processes:
@@ -86,6 +132,9 @@ if __name__ == "__main__":
     parser.add_argument("--mode", choices=['rtsp-h264', 'rtsp-h265', 'srt-h264', 'srt-h265'],
                         default='srt-h264',
                         help="Protocol + codec (default: srt-h264)")
+    parser.add_argument("--tee", action="store_true",
+                        help="Use a single ffmpeg with the tee muxer for all streams: the video is read "
+                             "(and for h265 modes, encoded with one NVENC session) once instead of N times")
 
     args = parser.parse_args()
 
@@ -102,5 +151,4 @@ if __name__ == "__main__":
     print(f"Starting {args.num} streams...")
     
     # Recommendation: Use 'srt-h264' (which maps to copy) to save CPU/GPU
-    publish(args.video, args.url, args.num, loop=not args.no_loop, mode=args.mode)
-
+    publish(args.video, args.url, args.num, loop=not args.no_loop, mode=args.mode, tee=args.tee)